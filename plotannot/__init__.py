@@ -2,17 +2,22 @@ from importlib import import_module
 
 from ._version import __version__
 
+__all__ = ["annotate_ticks", "format_ticklabels"]
+_submodules = ["functions", "code"]
+
 #Set functions to be available directly, i.e. "from plotannot import annotate"
-module = import_module("plotannot.functions")
-function_names = [func for func in dir(module) if callable(getattr(module, func)) and not func.startswith("__")]
-global_functions = ["plotannot.functions." + s for s in function_names]
+#plotannot.functions (and with it matplotlib) is only imported once a function is accessed
+def __getattr__(name):
+
+	if name in _submodules:
+		return import_module(f"plotannot.{name}")
+
+	if name in __all__:
+		attribute = getattr(import_module("plotannot.functions"), name)
+		globals()[name] = attribute #skip lookup on next access
+		return attribute
+
+	raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
 
-for f in global_functions:
-	
-	module_name = ".".join(f.split(".")[:-1])
-	attribute_name = f.split(".")[-1]
-	
-	module = import_module(module_name)
-	attribute = getattr(module, attribute_name)
-	
-	globals()[attribute_name] = attribute
\ No newline at end of file
+def __dir__():
+	return sorted(set(globals()) | set(__all__) | set(_submodules))
@@ -0,0 +1,257 @@
+#!/usr/bin/env python
+
+#Compiled kernels for the hot loops of PlotInfo
+#@author: Mette Bentsen
+#@contact: mette.bentsen (at) mpi-bn.mpg.de
+#@license: MIT
+
+import math
+import numpy as np
+
+#numba is optional; without it, the kernels run as plain python
+try:
+	from numba import njit
+except ImportError:
+	def njit(*args, **kwargs):
+		def decorator(func):
+			return func
+		return decorator
+
+
+@njit(cache=True)
+def interval_difference(a_start, a_end, b_start, b_end):
+	""" Split the interval [a_start, a_end] into the two parts not covered by [b_start, b_end]. Empty parts have start > end. """
+
+	if b_start > b_end: #b is empty; all of a is left
+		return a_start, a_end, a_end + 1, a_end
+
+	return a_start, min(a_end, b_start - 1), max(a_start, b_end + 1), a_end
+
+
+@njit(cache=True)
+def overlap_length(a_start, a_end, b_start, b_end):
+	""" Number of positions covered by both intervals [a_start, a_end] and [b_start, b_end] """
+
+	return max(0, min(a_end, b_end) - max(a_start, b_start) + 1)
+
+
+@njit(cache=True)
+def count_free_positions(start, end, extent_start, extent_end, i, j):
+	""" Count positions within [start, end) which are not covered by element i or element j """
+
+	if end <= start:
+		return 0
+
+	#Positions in range minus positions covered by i or j (counting positions covered by both once)
+	end = end - 1
+	covered_i = overlap_length(start, end, extent_start[i], extent_end[i])
+	covered_j = overlap_length(start, end, extent_start[j], extent_end[j])
+	covered_ij = overlap_length(max(start, extent_start[i]), min(end, extent_end[i]), extent_start[j], extent_end[j])
+
+	return (end - start + 1) - covered_i - covered_j + covered_ij
+
+
+@njit(cache=True)
+def update_argsort(order, values):
+	""" Re-sort indices in order by values (ties by index) in place.
+
+	Uses insertion sort, which is linear when order is already nearly sorted, e.g. when only a few values changed since the last sort.
+	"""
+
+	for k in range(1, len(order)):
+		i = order[k]
+		m = k - 1
+		while m >= 0 and (values[order[m]] > values[i] or (values[order[m]] == values[i] and order[m] > i)):
+			order[m + 1] = order[m]
+			m -= 1
+		order[m + 1] = i
+
+
+#Compiled for a single signature when the module is imported (loaded from the on-disk cache after the first compilation)
+@njit("Tuple((int32[::1], int64))(int32[::1], int32[::1], int32[::1], int32[::1], int32[::1], int64)", cache=True)
+def move_elements_nb(current_pos, target_pos, extent_start, extent_end, extent_sum, speed):
+	""" Move elements from their current position closer to their target position, given that they must not overlap.
+
+	Parameters
+	-------------
+	current_pos : numpy.ndarray
+		Current positions of elements (int32). Updated in place.
+	target_pos : numpy.ndarray
+		Target positions of elements (int32).
+	extent_start : numpy.ndarray
+		First position covered by each element (int32). Updated in place.
+	extent_end : numpy.ndarray
+		Last position covered by each element (int32). Updated in place.
+	extent_sum : numpy.ndarray
+		Number of elements covering each position (int32, length resolution). Updated in place.
+	speed : int
+		The speed with which the elements move to their target position (in integer positions).
+
+	Returns
+	-----------
+	tuple
+		The updated positions and the number of iterations run.
+	"""
+
+	n = len(current_pos)
+	resolution = len(extent_sum)
+
+	#Difference to target; buffer is reused across iterations
+	diff = np.empty(n, dtype=np.int32)
+
+	#Order of elements by difference to target; only elements moved in an iteration change order
+	diff_argsort = np.argsort(current_pos - target_pos, kind="mergesort")
+
+	#Shift elements until all elements fail to move
+	failed_count = 0 #count of elements which failed to move
+	iteration_count = 0
+	while failed_count < n:
+
+		failed_count = 0
+		iteration_count += 1
+
+		for k in range(n):
+			diff[k] = current_pos[k] - target_pos[k]
+		if not np.any(diff): #all elements are at their target
+			break
+
+		update_argsort(diff_argsort, diff)
+
+		#Shift starting with closest
+		for idx in range(n):
+
+			i = diff_argsort[idx]
+			this_label_pos = current_pos[i]
+			this_diff = diff[i]
+
+			#Element is already at target
+			if this_diff == 0:
+				failed_count += 1
+				continue
+
+			#What direction is the difference?
+			shift = 0
+			if this_diff > 0: #Difference is positive; shift should be negative (left)
+
+				if i == 0: #no elements to the left
+					shift = -1 * this_diff
+
+				else:
+					possible_shift = count_free_positions(current_pos[i-1], this_label_pos, extent_start, extent_end, i, i-1)
+					shift = min(possible_shift, abs(this_diff))
+					shift = min(shift, int(math.ceil(shift * speed))) #cap shift at speed
+					shift = -1 * shift
+
+			else: #difference is negative; shift should be positive (right)
+
+				if (i+1) == n: #no elements to the right
+					shift = -1 * this_diff
+
+				else:
+					possible_shift = count_free_positions(this_label_pos, current_pos[i+1], extent_start, extent_end, i, i+1)
+					shift = min(possible_shift, abs(this_diff))
+					shift = min(shift, int(math.ceil(shift * speed))) #cap shift at speed
+
+			#If shift is 0, element was not moved (=failed to move)
+			if shift == 0:
+				failed_count += 1
+				continue
+
+			#Extent of element before and after shift; positions outside of resolution are cut (an extent outside of resolution is empty)
+			old_start, old_end = extent_start[i], extent_end[i]
+			new_start = min(max(old_start + shift, 0), resolution)
+			new_end = max(min(old_end + shift, resolution - 1), -1)
+
+			#Positions left and reached by the element
+			left_0, left_1, left_2, left_3 = interval_difference(old_start, old_end, new_start, new_end)
+			reached_0, reached_1, reached_2, reached_3 = interval_difference(new_start, new_end, old_start, old_end)
+
+			#Change in the number of overlapping positions
+			overlap_change = 0
+			for k in range(left_0, left_1 + 1):
+				overlap_change -= int(extent_sum[k] == 2)
+			for k in range(left_2, left_3 + 1):
+				overlap_change -= int(extent_sum[k] == 2)
+			for k in range(reached_0, reached_1 + 1):
+				overlap_change += int(extent_sum[k] == 1)
+			for k in range(reached_2, reached_3 + 1):
+				overlap_change += int(extent_sum[k] == 1)
+
+			if overlap_change != 0: #shift would change overlaps; failed
+				failed_count += 1
+				continue
+
+			#Apply shift
+			for k in range(left_0, left_1 + 1):
+				extent_sum[k] -= 1
+			for k in range(left_2, left_3 + 1):
+				extent_sum[k] -= 1
+			for k in range(reached_0, reached_1 + 1):
+				extent_sum[k] += 1
+			for k in range(reached_2, reached_3 + 1):
+				extent_sum[k] += 1
+
+			extent_start[i] = new_start
+			extent_end[i] = new_end
+			current_pos[i] += shift
+
+	return current_pos, iteration_count
+
+
+@njit("Tuple((int32[::1], int64))(int32[::1], int64[::1], int64)", cache=True)
+def sweep_elements_nb(target_pos, offsets, resolution):
+	""" Place elements as close to their target position as possible without overlapping, in one sweep over the elements.
+
+	Parameters
+	-------------
+	target_pos : numpy.ndarray
+		Target positions of elements (int32, sorted).
+	offsets : numpy.ndarray
+		Offset of each element from the first element when elements are placed next to each other (int64).
+	resolution : int
+		Number of integer positions. The elements must fit into the range (offsets[-1] < resolution).
+
+	Returns
+	-----------
+	tuple
+		The new positions of elements and the number of clusters the elements were merged into.
+	"""
+
+	n = len(target_pos)
+
+	#Stack of clusters; each cluster covers elements first..last and is placed at base (position of an element with offset 0)
+	cluster_first = np.empty(n, dtype=np.int64)
+	cluster_last = np.empty(n, dtype=np.int64)
+	cluster_base_sum = np.empty(n, dtype=np.int64)
+	cluster_base = np.empty(n, dtype=np.int64)
+	n_clusters = 0
+
+	for i in range(n):
+		first = i
+		base_sum = target_pos[i] - offsets[i]
+
+		while True:
+			base = int(round(base_sum / (i - first + 1)))
+			base = min(max(base, -offsets[first]), resolution - 1 - offsets[i]) #keep cluster within range
+
+			#Merge with previous cluster if they overlap
+			if n_clusters > 0 and cluster_base[n_clusters - 1] > base:
+				n_clusters -= 1
+				first = cluster_first[n_clusters]
+				base_sum += cluster_base_sum[n_clusters]
+			else:
+				break
+
+		cluster_first[n_clusters] = first
+		cluster_last[n_clusters] = i
+		cluster_base_sum[n_clusters] = base_sum
+		cluster_base[n_clusters] = base
+		n_clusters += 1
+
+	#Positions of elements from the base of their cluster
+	new_pos = np.empty(n, dtype=np.int32)
+	for k in range(n_clusters):
+		for i in range(cluster_first[k], cluster_last[k] + 1):
+			new_pos[i] = cluster_base[k] + offsets[i]
+
+	return new_pos, n_clusters
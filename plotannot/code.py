@@ -6,11 +6,13 @@
 #@license: MIT
 
 import sys
+import functools
 import numpy as np
 import math
 import matplotlib
 import matplotlib.transforms
-import matplotlib.pyplot as plt
+import matplotlib.collections
+import matplotlib.lines
 
 #Functions for logging
 import logging
@@ -20,17 +22,43 @@ from logging import ERROR, INFO, DEBUG
 SPAM = DEBUG - 1
 logging.addLevelName(SPAM, 'SPAM')
 
+#Individual axis for each valid axis name
+_AXIS_MAP = {"xaxis": ("top", "bottom"), "yaxis": ("left", "right"),
+				"top": ("top",), "bottom": ("bottom",), "left": ("left",), "right": ("right",)}
+
+#Axis and tick attribute holding the ticklabels of each individual axis
+_LABEL_ATTR = {"bottom": ("xaxis", "label1"), "top": ("xaxis", "label2"), "left": ("yaxis", "label1"), "right": ("yaxis", "label2")}
+
+def _find_axes(o):
+	""" Find the axes holding xaxis/yaxis of an object; returns None if no axes were found """
+
+	#For sns.heatmap; axes is the object itself
+	if hasattr(o, "xaxis") and hasattr(o, "yaxis"):
+		return o
+
+	#For plt plots; get from _axes
+	elif hasattr(o, "_axes"):
+		return o._axes
+	
+	#for sns.clustermap; get from heatmap axes
+	elif hasattr(o, "ax_heatmap"):
+		return o.ax_heatmap
+
+	return None
+
+
 class PlotInfo():
 	""" A class collecting information on plot elements to annotate """ 
 
 	def __init__(self, o, verbosity=1):
 
 		self.set_logger(verbosity=verbosity)
-		self.get_figure()
 		self.get_axis(o)
+		self.get_figure()
 		self.get_transform()
 		self.get_axis_info()
 		self.get_tick_info()
+		self.tick_state = self.get_tick_state() #after drawing, as drawing can update ticks
 
 	def set_logger(self, verbosity=1):
 		""" Set logger for class.
@@ -57,11 +85,11 @@ class PlotInfo():
 			self.logger.removeHandler(handler)
 		self.logger.addHandler(logging.StreamHandler(sys.stdout))
 
-		#Create custom spam level
-		def spam(self, message, *args, **kwargs):
-			if self.isEnabledFor(SPAM):
-				self._log(SPAM, message, args, **kwargs)
-		self.logger.spam = lambda message, *args, **kwargs: spam(self.logger, message, *args, **kwargs)
+		#Create custom spam level; a no-op if level is not enabled, as spam is called within loops
+		if level <= SPAM:
+			self.logger.spam = functools.partial(self.logger.log, SPAM)
+		else:
+			self.logger.spam = lambda message, *args, **kwargs: None
 
 		#Format
 		formatter = logging.Formatter('[%(levelname)s] %(message)s')
@@ -69,10 +97,14 @@ class PlotInfo():
 		handler.setFormatter(formatter)
 
 	def get_figure(self):
-		""" Get the current figure """
+		""" Get the figure of axes; the figure is drawn if it changed since it was last drawn """
 
-		fig = plt.gcf()
-		fig.canvas.draw()
+		fig = self.ax.figure.canvas.figure #root figure; ax.figure can be a subfigure
+		if fig.stale:
+			if hasattr(fig, "draw_without_rendering"): #matplotlib >= 3.5; updates layout without rasterizing
+				fig.draw_without_rendering()
+			else:
+				fig.canvas.draw()
 
 		self.fig = fig
 		self.renderer = fig.canvas.get_renderer()
@@ -87,29 +119,17 @@ class PlotInfo():
 			An object to find xaxis/yaxis objects from.
 		"""
 
-		#For sns.heatmap; get axis directly from object
-		if hasattr(o, "xaxis") and hasattr(o, "yaxis"):
-			self.ax = o
-			self.xaxis = o.xaxis
-			self.yaxis = o.yaxis
-
-		#For plt plots; get from _axes
-		elif hasattr(o, "_axes"):
-			self.ax = o._axes
-			self.xaxis = self.ax.xaxis
-			self.yaxis = self.ax.yaxis
-		
-		#for sns.clustermap; get from heatmap axes
-		elif hasattr(o, "ax_heatmap"):
-			self.ax = o.ax_heatmap
-			self.xaxis = self.ax.xaxis
-			self.yaxis = self.ax.yaxis
+		ax = _find_axes(o)
 
 		#Todo: search for xaxis/yaxis in dict
-		else:
+		if ax is None:
 			self.logger.error("Could not find xaxis/yaxis in object")
 			sys.exit()
 
+		self.ax = ax
+		self.xaxis = ax.xaxis
+		self.yaxis = ax.yaxis
+
 	def get_transform(self):
 		"""
 		Get transformation objects for figure and data axis.
@@ -122,28 +142,36 @@ class PlotInfo():
 		self.trans_data = self.ax.transData
 		self.trans_data_inv = self.trans_data.inverted()
 
+	def get_tick_state(self):
+		""" Get a key describing the tick objects, tick positions and visibility of ticklabels of axes """
+
+		xticks, yticks = tuple(self.xaxis.majorTicks), tuple(self.yaxis.majorTicks) #copies; the lists are extended in place
+		visible = tuple(getattr(tick, label_attr)._visible for ticks in (xticks, yticks) for tick in ticks for label_attr in ("label1", "label2"))
+
+		return (xticks, yticks,
+				np.asarray(self.xaxis.get_majorticklocs()).tobytes(), np.asarray(self.yaxis.get_majorticklocs()).tobytes(),
+				visible)
+
+	def _stale(self):
+		""" Check whether ticks of axes changed since PlotInfo was created """
+
+		return self.get_tick_state() != self.tick_state
+
 	@staticmethod
 	def format_axis(axis):
 		""" Convert "xaxis" and "yaxis" names into "bottom", "top", "left", "right" """
 
-		#Establish axis
-		if axis == "xaxis":
-			axis = ["top", "bottom"]
-		elif axis == "yaxis":
-			axis = ["left", "right"]
-
 		if isinstance(axis, str):
-			axis = [axis]
+			return _AXIS_MAP[axis]
 
-		return axis
+		return tuple(axis) #already a list of individual axis
 	
 	@staticmethod
 	def check_axis(axis):
 		""" Check that axis is valid """
 
-		valid = ["xaxis", "yaxis", "top", "bottom", "left", "right"]
-		if axis not in valid:
-			raise ValueError(f"Given axis '{axis}' is not valid. Possible axis are: {valid}")
+		if not isinstance(axis, str) or axis not in _AXIS_MAP:
+			raise ValueError(f"Given axis '{axis}' is not valid. Possible axis are: {list(_AXIS_MAP)}")
 
 	@staticmethod
 	def check_value(value, vmin=-math.inf, vmax=math.inf, integer=False, name=None):
@@ -160,7 +188,7 @@ class PlotInfo():
 			#check if value is any value
 			try:
 				_ = int(value)
-			except:
+			except (TypeError, ValueError, OverflowError):
 				error_msg = "The {0} given ({1}) is not a valid number".format(name, value)
 
 		#If value is a number, check if it is within bounds
@@ -224,65 +252,81 @@ class PlotInfo():
 
 	def get_tick_info(self):
 		"""
-		Save information on tick and labels
+		Save information on tick and labels.
+
+		Objects and bboxes are saved as lists of dicts in label_info/tick_info, and sizes and positions as arrays in label_arr/tick_arr.
 		"""
 
-		axis_names = ["bottom", "top", "left", "right"]
-		
-		self.label_info = {a:[] for a in axis_names}
-		self.tick_info = {a:[] for a in axis_names}
+		self.label_info = {}
+		self.tick_info = {}
+		self.label_arr = {}
+		self.tick_arr = {}
 
 		#Collect labels and ticks from axis
-		for axis in ["xaxis", "yaxis"]:
+		for axis, sides in [("xaxis", ["bottom", "top"]), ("yaxis", ["left", "right"])]:
 
 			ticks = getattr(self, axis).get_major_ticks() #list of tick objects
-			for tick in ticks:
-				if axis == "xaxis":
-					self.label_info["bottom"].append({"object": tick.label1})
-					self.tick_info["bottom"].append({"object": tick.tick1line})
-					
-					self.label_info["top"].append({"object": tick.label2})
-					self.tick_info["top"].append({"object": tick.tick2line})
+			for side, label_attr, tick_attr in zip(sides, ["label1", "label2"], ["tick1line", "tick2line"]):
 
-				elif axis == "yaxis":
-					self.label_info["left"].append({"object": tick.label1})
-					self.tick_info["left"].append({"object": tick.tick1line})
-					
-					self.label_info["right"].append({"object": tick.label2})
-					self.tick_info["right"].append({"object": tick.tick2line})
+				#Only visible labels (and corresponding ticks) are used
+				pairs = [(getattr(tick, label_attr), getattr(tick, tick_attr)) for tick in ticks if getattr(tick, label_attr)._visible == True]
+				label_objects = [label for label, _ in pairs]
+				tick_objects = [tick for _, tick in pairs]
 
-		self.remove_invisible_labels()
+				#Add information about sizes and positions
+				label_bboxes, label_arr = self.get_extents(label_objects, side)
+				tick_bboxes, tick_arr = self.get_extents(tick_objects, side)
 
-		#Add additional information about sizes and positions
-		for axis in axis_names:
-			for l in [self.label_info[axis], self.tick_info[axis]]: #for each list
-				for d in l:	#for each dict in list
+				#Sort from lowest to highest inches positions on axis
+				ind_to_sort = np.argsort(label_arr["pos_inch_para"])
+				self.label_arr[side] = {key: arr[ind_to_sort] for key, arr in label_arr.items()}
+				self.tick_arr[side] = {key: arr[ind_to_sort] for key, arr in tick_arr.items()}
+				self.label_info[side] = [{"object": label_objects[i], "bbox": label_bboxes[i]} for i in ind_to_sort]
+				self.tick_info[side] = [{"object": tick_objects[i], "bbox": tick_bboxes[i]} for i in ind_to_sort]
+
+	def get_extents(self, objects, axis):
+		""" Get sizes and positions of objects in inches and data coordinates, parallel and perpendicular to axis.
+
+		Parameters
+		------------
+		objects : list
+			List of matplotlib artists, e.g. ticklabels or ticklines.
+		axis : str
+			Name of axis. One of: "top", "bottom", "left", "right".
 
-					bbox = d["object"].get_window_extent(self.renderer)
-					bbox_inch = bbox.transformed(self.trans_fig_inv) #to inches
-					bbox_data = bbox.transformed(self.trans_data_inv) #to data
+		Returns
+		---------
+		tuple
+			A list of bboxes (in display coordinates) and a dict of arrays with sizes and positions for each object.
+		"""
 
-					para_0, para_1 = (bbox_inch.x0, bbox_inch.x1) if axis in ["top", "bottom"] else (bbox_inch.y0, bbox_inch.y1) # in inches
-					perp_0, perp_1 = (bbox_inch.y0, bbox_inch.y1) if axis in ["top", "bottom"] else (bbox_inch.x0, bbox_inch.x1) #perpendicular size in inches
+		#Index of parallel and perpendicular coordinates in points
+		para, perp = (0, 1) if axis in ["top", "bottom"] else (1, 0)
 
-					para_data_0, para_data_1 = (bbox_data.x0, bbox_data.x1) if axis in ["top", "bottom"] else (bbox_data.y0, bbox_data.y1) #parallel size in data coordinates
-					perp_data_0, perp_data_1 = (bbox_data.y0, bbox_data.y1) if axis in ["top", "bottom"] else (bbox_data.x0, bbox_data.x1) #in data coordinates
+		#Measure each object once and transform all corners of bboxes at once
+		bboxes = [o.get_window_extent(self.renderer) for o in objects]
+		if len(bboxes) > 0:
+			points = np.array([bbox.get_points() for bbox in bboxes]).reshape(-1, 2) #(x0, y0), (x1, y1) for each bbox
+			points_inch = self.trans_fig_inv.transform(points).reshape(-1, 2, 2) #to inches
+			points_data = self.trans_data_inv.transform(points).reshape(-1, 2, 2) #to data
+		else:
+			points_inch = points_data = np.zeros((0, 2, 2))
 
-					additional_info = {"bbox": bbox, "from_inch": para_0, "to_inch": para_1, 
-										"pos_inch_para": np.mean([para_0, para_1]), "extent_inch_para": para_1-para_0,
-										"pos_data_para": np.mean([para_data_0, para_data_1]), "extent_data_para": para_data_1-para_data_0,
+		para_0, para_1 = points_inch[:, 0, para], points_inch[:, 1, para] # in inches
+		perp_0, perp_1 = points_inch[:, 0, perp], points_inch[:, 1, perp] #perpendicular size in inches
 
-										"pos_inch_perp": np.mean([perp_0, perp_1]), "extent_inch_perp": perp_1-perp_0,
-										"pos_data_perp": np.mean([perp_data_0, perp_data_1]), "extent_data_perp": perp_data_1-perp_data_0
-										}
+		para_data_0, para_data_1 = points_data[:, 0, para], points_data[:, 1, para] #parallel size in data coordinates
+		perp_data_0, perp_data_1 = points_data[:, 0, perp], points_data[:, 1, perp] #in data coordinates
 
-					d.update(additional_info) #update dict in place
+		arrays = {"from_inch": para_0, "to_inch": para_1, 
+					"pos_inch_para": (para_0 + para_1) / 2, "extent_inch_para": para_1-para_0,
+					"pos_data_para": (para_data_0 + para_data_1) / 2, "extent_data_para": para_data_1-para_data_0,
 
-			#Sort from lowest to highest inches positions on axis
-			ind_to_sort = np.argsort([d["pos_inch_para"] for d in self.label_info[axis]])
-			self.label_info[axis] = [self.label_info[axis][i] for i in ind_to_sort]
-			self.tick_info[axis] = [self.tick_info[axis][i] for i in ind_to_sort]
+					"pos_inch_perp": (perp_0 + perp_1) / 2, "extent_inch_perp": perp_1-perp_0,
+					"pos_data_perp": (perp_data_0 + perp_data_1) / 2, "extent_data_perp": perp_data_1-perp_data_0
+					}
 
+		return bboxes, arrays
 
 	def remove_invisible_labels(self):
 		"""
@@ -291,9 +335,17 @@ class PlotInfo():
 
 		#Remove any invisible labels from the lists
 		for axis in self.label_info:
-			visible_indices = [i for i, d in enumerate(self.label_info[axis]) if d["object"]._visible == True]
-			self.label_info[axis] = [self.label_info[axis][i] for i in visible_indices]
-			self.tick_info[axis] = [self.tick_info[axis][i] for i in visible_indices]
+
+			n = len(self.label_info[axis])
+			visible = np.fromiter((d["object"]._visible for d in self.label_info[axis]), dtype=bool, count=n)
+			if visible.all():
+				continue #all labels are visible; nothing to remove
+
+			visible_indices = np.flatnonzero(visible)
+			self.label_info[axis] = [self.label_info[axis][i] for i in visible_indices.tolist()]
+			self.tick_info[axis] = [self.tick_info[axis][i] for i in visible_indices.tolist()]
+			self.label_arr[axis] = {key: arr[visible_indices] for key, arr in self.label_arr[axis].items()}
+			self.tick_arr[axis] = {key: arr[visible_indices] for key, arr in self.tick_arr[axis].items()}
 
 
 	#------------------- Subset and format labels -----------------#
@@ -327,6 +379,7 @@ class PlotInfo():
 				else:
 					found.append(label_text)
 
+		self.ax.stale = True #changes to ticklabels are not propagated to the figure
 		self.remove_invisible_labels()
 
 
@@ -369,96 +422,88 @@ class PlotInfo():
 		for axis in self.label_info:
 			self.logger.debug(f"Getting integer positions for labels on {axis} axis")
 
-			#Initialize tick positions in integer space
-			n = len(self.label_info[axis])
-			text_positions_int = []
-			tick_positions_int = []
-		
-			#Fill in information from each label
-			for i in range(n):
-				
-				#Size and position of label
-				label_position = self.label_info[axis][i]["pos_inch_para"]
-
-				#Extent of axes
-				ax_start = self.axis_info[axis]["from_inch"]
-				ax_extent = self.axis_info[axis]["extent_inch"]
-
-				#Calculate integer values for labels
-				label_position_int = int(((label_position - ax_start) / ax_extent) * resolution)
-
-				#make sure that the positions are not out of bounds
-				label_position_int = min(label_position_int, resolution) 
-				label_position_int = max(label_position_int, 0)
-		
-				#Fill lists
-				tick_positions_int.append(label_position_int)
-				text_positions_int.append(label_position_int)
+			#Extent of axes
+			ax_start = self.axis_info[axis]["from_inch"]
+			ax_extent = self.axis_info[axis]["extent_inch"]
 
+			#Calculate integer values for labels; make sure that the positions are not out of bounds
+			label_positions_int = ((self.label_arr[axis]["pos_inch_para"] - ax_start) / ax_extent * resolution).astype(np.int32)
+			np.clip(label_positions_int, 0, resolution, out=label_positions_int)
 
 			#Save information for axis
-			self.integer_positions[axis] = {"text_pos_int_arr": text_positions_int,
-											"tick_pos_int_arr": tick_positions_int}
+			self.integer_positions[axis] = {"text_pos_int_arr": label_positions_int,
+											"tick_pos_int_arr": label_positions_int.copy()}
 			
 	
 	def get_extent_matrix(self, rel_label_size=1, resolution=1000):
-		""" Set extent of labels based on widths of labels """
+		""" Set extent of labels based on widths of labels.
+		
+		The extent of each label is saved as the interval [extent_start, extent_end] of integer positions covered by the label,
+		along with the number of labels covering each integer position of the axis.
+		"""
 
 		for axis in self.label_info:
 
-			n = len(self.label_info[axis])
-			extent_matrix_int = np.zeros((n, resolution))
-
-			for i in range(n):
-				
-				label_position_int = self.integer_positions[axis]["text_pos_int_arr"][i] #current position of label
-				label_extent = self.label_info[axis][i]["extent_inch_para"] * rel_label_size
-				ax_extent = self.axis_info[axis]["extent_inch"]
+			label_positions_int = np.asarray(self.integer_positions[axis]["text_pos_int_arr"], dtype=np.int32) #current position of labels
+			label_extents = self.label_arr[axis]["extent_inch_para"] * rel_label_size
+			ax_extent = self.axis_info[axis]["extent_inch"]
 
-				#Get extent of label
-				extent_half_int = int((label_extent / ax_extent / 2) * resolution)
-				extent_start = label_position_int - extent_half_int
-				extent_end = label_position_int + extent_half_int
+			#Get extent of labels; make sure that the positions are not out of bounds
+			extent_half_int = (label_extents / ax_extent / 2 * resolution).astype(np.int32)
+			self.integer_positions[axis]["extent_half_int_arr"] = extent_half_int
+			extent_start_arr = np.clip(label_positions_int - extent_half_int, 0, None)
+			extent_end_arr = np.clip(label_positions_int + extent_half_int, None, resolution-1)
 
-				#Make sure that the positions are not out of bounds
-				label_position_int = min(label_position_int, resolution) 
-				label_position_int = max(label_position_int, 0)
-				extent_start = max(0, extent_start)
-				extent_end = min(extent_end, resolution)
+			#Count labels covering each position from the starts and ends of the (non-empty) extents
+			covering = extent_start_arr <= extent_end_arr
+			extent_sum_arr = np.bincount(extent_start_arr[covering], minlength=resolution+1)
+			extent_sum_arr -= np.bincount(extent_end_arr[covering] + 1, minlength=resolution+1)
+			extent_sum_arr = np.cumsum(extent_sum_arr[:resolution]).astype(np.int32)
 
-				#Fill matrix
-				extent_matrix_int[i, extent_start:extent_end+1] = 1
+			self.integer_positions[axis]["extent_start_int_arr"] = extent_start_arr
+			self.integer_positions[axis]["extent_end_int_arr"] = extent_end_arr
+			self.integer_positions[axis]["extent_sum_int_arr"] = extent_sum_arr
 
-			self.integer_positions[axis]["extent_matrix_int"] = extent_matrix_int
-
-	@staticmethod
-	def roll_matrix(matrix, i, shift):
-		""" 
-		Roll a matrix along ith rows by shift positions.
+	def sweep_elements(self, target_pos_arr, extent_half_arr, resolution=1000):
+		""" Place elements as close to their target position as possible without overlapping, in one sweep over the elements.
 
+		Elements are placed in order of their target positions. Overlapping elements are merged into clusters,
+		which are centered on the mean of their targets and kept within the range of resolution.
+		
 		Parameters
 		-------------
-		matrix : numpy.ndarray
-			2D array
-		i : int
-			Index of axis to roll along.
-		shift : int
-			Number of positions to shift.
+		target_pos_arr : array
+			Target positions of elements (sorted).
+		extent_half_arr : array
+			Half extent of each element.
+		resolution : int, optional
+			Number of integer positions. Default: 1000.
+
+		Returns
+		-----------
+		array or None
+			The new positions of elements, or None if the elements cannot be fit into the range without overlap.
 		"""
-		
-		arr = matrix[i]
-		rolled = np.roll(arr, shift)
-		
-		if shift < 0:
-			rolled[shift:] = 0 #last values are 0
-		else:
-			rolled[:shift] = 0 #first values are 0
-		
-		matrix[i,:] = rolled
-		
-		return matrix
 
-	def move_elements(self, current_pos_arr, target_pos_arr, extent_matrix, speed=0.1):
+		n = len(target_pos_arr)
+
+		#Offset of each element from the first element when elements are placed next to each other
+		gaps = extent_half_arr[:-1].astype(np.int64) + extent_half_arr[1:] + 1
+		offsets = np.concatenate(([0], np.cumsum(gaps)))
+		if offsets[-1] > resolution - 1:
+			return None #elements do not fit
+
+		#Merge elements into clusters and place clusters
+		from plotannot._accel import sweep_elements_nb #compiled kernel is only loaded when labels are shifted
+		target_pos_arr = np.ascontiguousarray(target_pos_arr, dtype=np.int32)
+		offsets = np.ascontiguousarray(offsets, dtype=np.int64)
+		new_pos_arr, cluster_count = sweep_elements_nb(target_pos_arr, offsets, resolution)
+
+		self.logger.debug(f"Placed {n} elements in {cluster_count} clusters")
+
+		return new_pos_arr
+
+	def move_elements(self, current_pos_arr, target_pos_arr, extent_start_arr, extent_end_arr, extent_sum_arr, speed=0.1):
 		""" Move elements from their current position closer to their target position, given that they must not overlap.
 		
 		Parameters
@@ -467,93 +512,32 @@ class PlotInfo():
 			Current positions of elements.
 		target_pos_arr : array
 			Target positions of elements.
-		extent_matrix : matrix
-			Matrix containing the extent of each element.
+		extent_start_arr : array
+			First position covered by each element.
+		extent_end_arr : array
+			Last position covered by each element.
+		extent_sum_arr : array
+			Number of elements covering each position.
 		speed : integer
 			The speed with which the elements move to their target position. Default: 0.1.
 		"""
 
-		#Initialize counts
-		failed_count = 0 #count of labels which failed to move
-		iteration_count = 0
 		n = len(current_pos_arr) #number of elements
-		resolution = extent_matrix.shape[1]
+		resolution = len(extent_sum_arr)
 
 		speed = max(int(speed * resolution), 1) #make sure that speed is at least 1
 		self.logger.debug(f"speed is {speed} (resolution: {resolution})")
 
 		#Shift elements until all elements fail to move
-		while failed_count < n:
-			
-			failed_count = 0 #intialize failed_count for this iteration
-			iteration_count += 1 #increment iteration count
-			
-			#calculate differences
-			diff = current_pos_arr - target_pos_arr
-			diff_argsort = np.argsort(diff)
-			
-			#Shift starting with closest
-			for i in diff_argsort:
-				
-				this_label_pos = current_pos_arr[i]
-				this_target_pos = target_pos_arr[i]
-				this_diff = diff[i]
-				self.logger.spam(f"Label with index {i} (pos: {this_label_pos}) is closest to target (pos: {this_target_pos}) with a diff of {this_diff}")
-				
-				#What direction is the difference?
-				shift = 0
-				if this_diff > 0: #Difference is positive; shift should be negative (left)
-
-					if i == 0: #if i is 0, there are no labels to the left, and 
-						shift = -1 * this_diff #label can move directly to the left
-
-					else:
-						#Get next label is to the left
-						left_label_pos = current_pos_arr[i-1] #position of the label to the left
-						arr = extent_matrix[[i,i-1], :].sum(axis=0)
-						possible_shift = sum(arr[left_label_pos:this_label_pos] == 0) #space between left and current label
-						self.logger.spam(f"Possible shift without overlap is {possible_shift}")
-
-						shift = min(possible_shift, np.abs(this_diff))
-						shift = min(shift, int(np.ceil(shift * speed))) #cap shift at speed
-						shift = -1 * shift #shift to the left (-)
-						
-				else: #difference is negative or 0; shift should be positive (right)
-
-					if (i+1) == n: #if i+1 is n; there are no labels to the right
-						shift = this_diff #label can move directly to the right
-					
-					else:
-						#Get next label is to the right
-						right_label_pos = current_pos_arr[i+1]
-						arr = extent_matrix[[i,i+1]].sum(axis=0)
-
-						possible_shift = sum(arr[this_label_pos:right_label_pos] == 0)
-						shift = min(possible_shift, np.abs(this_diff)) #shift to the right (+)
-						shift = min(shift, int(np.ceil(shift * speed))) #cap shift at speed
-					
-				self.logger.spam(f"Trying to shift label by {shift}")
-				
-				#If shift is 0, label was not moved (=failed to move)
-				if shift == 0:
-					failed_count += 1
-					
-				else:
-					
-					#Try to perform roll of index
-					overlap_before = sum(extent_matrix.sum(axis=0) > 1) #positions with more than two labels
-					extent_rolled = PlotInfo.roll_matrix(extent_matrix, i, shift)
-					overlap_after = sum(extent_rolled.sum(axis=0) > 1)
-
-					if overlap_before - overlap_after == 0: #no changes in overlaps; success
-						extent_matrix = extent_rolled #update
-						current_pos_arr[i] += shift
-
-					else:
-						failed_count += 1
-						#print("Failed to move label. Current failed count is: {0}/{1}".format(failed_count, n))
-			
-			self.logger.debug(f"Finished iteration {iteration_count} of moves: Failed count is {failed_count}/{n}")
+		from plotannot._accel import move_elements_nb #compiled kernel is only loaded when labels are shifted
+		current_pos_arr = np.ascontiguousarray(current_pos_arr, dtype=np.int32)
+		target_pos_arr = np.ascontiguousarray(target_pos_arr, dtype=np.int32)
+		extent_start_arr = np.ascontiguousarray(extent_start_arr, dtype=np.int32)
+		extent_end_arr = np.ascontiguousarray(extent_end_arr, dtype=np.int32)
+		extent_sum_arr = np.ascontiguousarray(extent_sum_arr, dtype=np.int32)
+		current_pos_arr, iteration_count = move_elements_nb(current_pos_arr, target_pos_arr, extent_start_arr, extent_end_arr, extent_sum_arr, speed)
+
+		self.logger.debug(f"Finished moving {n} elements in {iteration_count} iterations")
 
 		#Make sure positions are within bounds of resolution
 		current_pos_arr = np.clip(current_pos_arr, 0, resolution-1)
@@ -573,7 +557,7 @@ class PlotInfo():
 		rel_label_size : float, optional
 			Relative size of labels. Default: 1.1. 
 		speed : float, optional
-			The speed with which labels move. Default: 0.1.
+			The speed with which labels move. Only used if labels cannot be fit into the range without overlap. Default: 0.1.
 		"""
 		
 		self.check_axis(axis)
@@ -581,7 +565,8 @@ class PlotInfo():
 		self.check_value(rel_label_size, vmin=0, name="rel_label_size")
 		self.check_value(speed, vmin=0, vmax=1, name="speed")
 
-		self.get_integer_positions() #get integer arrays for labels
+		self.get_integer_positions(resolution=resolution) #get integer arrays for labels
+		self.get_extent_matrix(resolution=resolution, rel_label_size=rel_label_size) #get extent of labels
 		
 		axis = self.format_axis(axis)
 		
@@ -594,37 +579,46 @@ class PlotInfo():
 			self.logger.debug("Shifting integer labels on axis: {0}".format(a))
 			self.logger.spam("Initial text positions: {0} (...)".format(self.integer_positions[a]["text_pos_int_arr"][:10]))
 
-			#Start by distributing labels across whole axis
-			n = len(self.integer_positions[a]["text_pos_int_arr"])
-			new_text_positions = np.linspace(0, resolution, n).astype(int)
-			self.integer_positions[a]["text_pos_int_arr"] = new_text_positions #update positions array
-			self.logger.spam(f"Initial distribution of labels across axis. New positions are: {new_text_positions[:10]} (...)")
-			self.get_extent_matrix(resolution=resolution, rel_label_size=rel_label_size) #update label extent after shifting
-			
-
-			#--------- Shift labels closer to ticks without overlapping -------#
-			extent_matrix = self.integer_positions[a]["extent_matrix_int"]
-			text_positions = self.integer_positions[a]["text_pos_int_arr"]
+			#--------- Place labels as close to ticks as possible without overlapping -------#
 			tick_positions = self.integer_positions[a]["tick_pos_int_arr"]
-			
-			#Check initial overlaps
-			overlap = extent_matrix.sum(axis=0)
-			if max(overlap) > 1: #if any position has more than one label
-				self.logger.warning("The labels cannot be fit into the range without overlap.")
-
-				#How much space would be needed?
-				space_needed = sum(extent_matrix.sum(axis=1))
-				resolution = extent_matrix.shape[1]
-				
-				needed_extend = space_needed / resolution - 1
-				self.logger.warning(f"Set 'expand_axis' to at least {needed_extend:.2f} in order to fit labels into the range.")
-
+			extent_half = self.integer_positions[a]["extent_half_int_arr"]
+			new_text_positions = self.sweep_elements(target_pos_arr=tick_positions, extent_half_arr=extent_half, resolution=resolution)
+
+			if new_text_positions is None: #labels cannot be fit into the range without overlap
+
+				#Start by distributing labels across whole axis
+				n = len(self.integer_positions[a]["text_pos_int_arr"])
+				new_text_positions = np.linspace(0, resolution, n).astype(int)
+				self.integer_positions[a]["text_pos_int_arr"] = new_text_positions #update positions array
+				self.logger.spam(f"Initial distribution of labels across axis. New positions are: {new_text_positions[:10]} (...)")
+				self.get_extent_matrix(resolution=resolution, rel_label_size=rel_label_size) #update label extent after shifting
+
+				#--------- Shift labels closer to ticks without overlapping -------#
+				extent_start = self.integer_positions[a]["extent_start_int_arr"]
+				extent_end = self.integer_positions[a]["extent_end_int_arr"]
+				extent_sum = self.integer_positions[a]["extent_sum_int_arr"]
+				text_positions = self.integer_positions[a]["text_pos_int_arr"]
+
+				#Check initial overlaps; labels are ordered by position, so any overlap includes an overlap between neighboring (non-empty) labels
+				covering = extent_start <= extent_end
+				overlapping = extent_start[covering][1:] <= extent_end[covering][:-1]
+				if overlapping.any():
+					self.logger.debug(f"Found {overlapping.sum()} overlapping pairs of neighboring labels")
+					self.logger.warning("The labels cannot be fit into the range without overlap.")
+
+					#How much space would be needed?
+					space_needed = np.clip(extent_end - extent_start + 1, 0, None).sum()
+					
+					needed_extend = space_needed / resolution - 1
+					self.logger.warning(f"Set 'expand_axis' to at least {needed_extend:.2f} in order to fit labels into the range.")
 
-			##### shift until no longer possible
-			new_text_positions = self.move_elements(current_pos_arr=text_positions, 
-													target_pos_arr=tick_positions,
-													extent_matrix=extent_matrix,
-													speed=speed)
+				##### shift until no longer possible
+				new_text_positions = self.move_elements(current_pos_arr=text_positions, 
+														target_pos_arr=tick_positions,
+														extent_start_arr=extent_start,
+														extent_end_arr=extent_end,
+														extent_sum_arr=extent_sum,
+														speed=speed)
 
 			self.logger.spam(f"Done shifting labels on axis {a}. New positions are: {new_text_positions[:10]}")
 			
@@ -659,47 +653,46 @@ class PlotInfo():
 			self.logger.debug(f"Applying shift for axis: {a}")
 
 			#Convert integers back to inches
-			resolution = self.integer_positions[a]["extent_matrix_int"].shape[1] #width of matrix
+			resolution = len(self.integer_positions[a]["extent_sum_int_arr"]) #number of integer positions
 			inches_arr = np.linspace(self.axis_info[a]["from_inch"], self.axis_info[a]["to_inch"], resolution)
 
 			text_positions_int = self.integer_positions[a]["text_pos_int_arr"]  #np.clip(text_positions_int, 0, resolution-1)
 			text_positions_inch = inches_arr[text_positions_int]
 
-			#Move labels to new positions in inches space
-			for i, d in enumerate(self.label_info[a]): #loop over list of dicts
+			#Parallel location change of labels
+			old_para_arr = self.label_arr[a]["pos_inch_para"]
+			d_para_arr = text_positions_inch - old_para_arr
 
-				self.logger.spam(f"Moving tick {i} ({d['object']._text})")
+			#Find the perpendicular shift in relation to ticks; decide whether to shift left/right/up/down
+			tick_len_inch_arr = self.tick_arr[a]["extent_inch_perp"]
+			d_perp_arr = tick_len_inch_arr * perp_shift
+			if a in ["bottom", "left"]:
+				d_perp_arr = -1 * d_perp_arr
 
-				#Find the perpendicular shift in relation to ticks
-				tick_len_inch = self.tick_info[a][i]["extent_inch_perp"]  #tick_bbox_inch.height if axis in ["top", "bottom"] else tick_bbox_inch.width # in inches 
-				this_perp_shift = tick_len_inch * perp_shift
+			#dx/dy in inches
+			dx_arr, dy_arr = (d_perp_arr, d_para_arr) if a in ["left", "right"] else (d_para_arr, d_perp_arr)
 
-				#Decide whether to shift left/right/up/down
-				if a in ["bottom", "left"]:
-					this_perp_shift = -1 * this_perp_shift
+			#Shift of labels in display coordinates; used to find the shifted bbox of labels without measuring labels again
+			trans_fig = self.trans_fig
+			d_display_arr = trans_fig.transform(np.column_stack((dx_arr, dy_arr))) - trans_fig.transform((0, 0))
 
-				self.logger.spam(f"Tick is {tick_len_inch:0.3f} inches wide; perpendicular shift will be {this_perp_shift:0.3f}.")
-				
-				#Get position of shifted label
-				old_para = self.label_info[a][i]["pos_inch_para"]
-				new_para = text_positions_inch[i]
-				d_para = new_para - old_para
-				d_perp = this_perp_shift 
-				self.logger.spam(f"Parallel location change: {d_para:.3f} ({old_para:.3f} -> {new_para:.3f})")
+			#Move labels to new positions in inches space
+			#Note: labels are moved by transform, as the position of ticklabels is reset by matplotlib when drawing
+			for i, d in enumerate(self.label_info[a]): #loop over list of dicts
+
+				self.logger.spam("Moving tick %d (%s)", i, d["object"]._text)
+				self.logger.spam("Tick is %0.3f inches wide; perpendicular shift will be %0.3f.", tick_len_inch_arr[i], d_perp_arr[i])
+				self.logger.spam("Parallel location change: %.3f (%.3f -> %.3f)", d_para_arr[i], old_para_arr[i], text_positions_inch[i])
 
-				#dx/dy in inches
-				if a in ["left", "right"]:
-					dx, dy = d_perp, d_para
-				else:
-					dx, dy = d_para, d_perp 
-					
 				#Apply transformation
-				offset = matplotlib.transforms.ScaledTranslation(dx, dy, self.trans_fig) #from inches into display
-				label = self.label_info[a][i]["object"]
+				offset = matplotlib.transforms.ScaledTranslation(dx_arr[i], dy_arr[i], trans_fig) #from inches into display
+				label = d["object"]
 				label.set_transform(label.get_transform() + offset)
 
 				#Save shifted box
-				d["bbox_shifted"] = label.get_window_extent() #now shifted
+				d["bbox_shifted"] = d["bbox"].translated(*d_display_arr[i])
+
+			self.ax.stale = True #changes to ticklabels are not propagated to the figure
 
 	def plot_annotation_lines(self, axis, rel_tick_size=0.25):
 		""" Plot lines from the original ticks to the newly shifted labels on the plot. """
@@ -708,54 +701,62 @@ class PlotInfo():
 		axis = self.format_axis(axis)
 
 		for a in axis:
-			for i in range(len(self.label_info[a])):
 
-				self.logger.spam("Plotting annotation line for tick {}".format(i))
+			n = len(self.label_info[a])
+			if n == 0:
+				continue #no labels to annotate for axis
 
-				#Find out how much labels were shifted in data space
-				original_label_bbox = self.label_info[a][i]["bbox"].transformed(self.trans_data_inv) #from display to data
-				shifted_label_bbox = self.label_info[a][i]["bbox_shifted"].transformed(self.trans_data_inv) #from display to data
+			#Index of parallel and perpendicular coordinates
+			para, perp = (0, 1) if a in ["top", "bottom"] else (1, 0)
 
-				#perpendicular shift of labels; either positive or negative
-				if a in ["top", "bottom"]:
-					perp_shift_data = shifted_label_bbox.y0 - original_label_bbox.y0 
-				else:
-					perp_shift_data = shifted_label_bbox.x0 - original_label_bbox.x0  
-				
-				self.logger.spam("The perpendicular shift of label is: {}".format(perp_shift_data))
-					
-				#Start position of ticks on the perpendicular axis
-				perp_shift_start = self.tick_info[a][i]["pos_data_perp"]
-				self.logger.spam(f"The start of tick in data coordinates is: {perp_shift_start:3f}")
-
-				#Shift locations of each line segment in data coordinates (parallel)
-				t1 = perp_shift_start + perp_shift_data #perp_shift is already negative if needed
-				t2 = t1 - perp_shift_data * rel_tick_size / 2
-				t3 = perp_shift_start + perp_shift_data * rel_tick_size / 2
-				t4 = perp_shift_start              #location of axis
-				
-				#New positions in data coordinates
-				old_para = self.tick_info[a][i]["pos_data_para"]
-				new_para = (shifted_label_bbox.x0 + shifted_label_bbox.x1)/2 if a in ["top", "bottom"] else (shifted_label_bbox.y0 + shifted_label_bbox.y1)/2
-						
-				#Plot annotation line
-				perp_coord = [t1, t2, t3, t4]                         #perpendicular to axis; from label to axis
-				para_coord = [new_para, new_para, old_para, old_para] #parallel to axis
-				tick_lw = self.tick_info[a][i]["object"].get_markeredgewidth()
-				color = self.tick_info[a][i]["object"].get_color() #carry over existing color of tick
-				
-				#Get axes limits before plotting
-				orig_xlim = self.ax.get_xlim()
-				orig_ylim = self.ax.get_ylim()
-
-				if a in ["top", "bottom"]:
-					self.ax.plot(para_coord, perp_coord, clip_on=False, lw=tick_lw, color=color) #plot from inches coordinates
-				else:
-					self.ax.plot(perp_coord, para_coord, clip_on=False, lw=tick_lw, color=color) #plot from inches coordinates
+			#Corners of original and shifted label bboxes in data coordinates; all transformed at once
+			bboxes = [d["bbox"] for d in self.label_info[a]] + [d["bbox_shifted"] for d in self.label_info[a]]
+			points = np.array([bbox.get_points() for bbox in bboxes]).reshape(-1, 2)
+			original_points, shifted_points = self.trans_data_inv.transform(points).reshape(2, n, 2, 2) #from display to data
+
+			#Find out how much labels were shifted in data space; perpendicular shift of labels is either positive or negative
+			perp_shift_data = shifted_points[:, 0, perp] - original_points[:, 0, perp]
+			self.logger.spam("The perpendicular shift of labels is: %s (...)", perp_shift_data[:10])
+
+			#Start position of ticks on the perpendicular axis
+			perp_shift_start = self.tick_arr[a]["pos_data_perp"]
+			self.logger.spam("The start of ticks in data coordinates is: %s (...)", perp_shift_start[:10])
+
+			#Shift locations of each line segment in data coordinates (parallel)
+			t1 = perp_shift_start + perp_shift_data #perp_shift is already negative if needed
+			t2 = t1 - perp_shift_data * rel_tick_size / 2
+			t3 = perp_shift_start + perp_shift_data * rel_tick_size / 2
+			t4 = perp_shift_start              #location of axis
+
+			#New positions in data coordinates
+			old_para = self.tick_arr[a]["pos_data_para"]
+			new_para = (shifted_points[:, 0, para] + shifted_points[:, 1, para]) / 2
+
+			#Annotation lines; one line of 4 points per tick
+			segments = np.empty((n, 4, 2))
+			segments[:, :, perp] = np.column_stack((t1, t2, t3, t4))                         #perpendicular to axis; from label to axis
+			segments[:, :, para] = np.column_stack((new_para, new_para, old_para, old_para)) #parallel to axis
 
-				#Set axes limit in case they were changed by plotting
-				self.ax.set_xlim(orig_xlim)
-				self.ax.set_ylim(orig_ylim)
+			tick_lws = []
+			colors = []
+			for d in self.tick_info[a]:
+				tick_lws.append(d["object"].get_markeredgewidth())
+				colors.append(d["object"].get_color()) #carry over existing color of tick
 
 				#Hide original tick
-				self.tick_info[a][i]["object"].set_visible(False)
\ No newline at end of file
+				d["object"].set_visible(False)
+
+			#Get axes limits before plotting
+			orig_xlim = self.ax.get_xlim()
+			orig_ylim = self.ax.get_ylim()
+
+			#Plot all annotation lines as one collection; style as lines from ax.plot
+			lines = matplotlib.collections.LineCollection(segments, linewidths=tick_lws, colors=colors, clip_on=False,
+															capstyle=matplotlib.rcParams["lines.solid_capstyle"],
+															joinstyle=matplotlib.rcParams["lines.solid_joinstyle"],
+															zorder=matplotlib.lines.Line2D.zorder)
+			self.ax.add_collection(lines)
+
+			#Set axes limit in case they were changed by plotting
+			self.ax.set_xlim(orig_xlim)
+			self.ax.set_ylim(orig_ylim)
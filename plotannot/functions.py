@@ -5,8 +5,7 @@
 #@contact: mette.bentsen (at) mpi-bn.mpg.de
 #@license: MIT
 
-
-import plotannot.code
+#plotannot.code (and with it matplotlib and numpy) is imported within functions; only loaded once a function is called
 
 def annotate_ticks(ax, axis, labels,
 					expand_axis=0,
@@ -41,12 +40,14 @@ def annotate_ticks(ax, axis, labels,
 	resolution : int, optional
 		Resolution for finding overlapping labels. Default: 1000.
 	speed : float, optional
-		The speed with which the labels are moving when removing overlaps. A float value between 0-1. Default: 0.1.
+		The speed with which the labels are moving when removing overlaps. A float value between 0-1. Only used if the labels cannot be fit into the range without overlap. Default: 0.1.
 	verbosity : int, optional
 		The level of logging from the function. An integer between 0 and 3, corresponding to: 0: only errors, 1: minimal, 2: debug, 3: spam debug. Default: 1.
 	"""
 
-	p = plotannot.code.PlotInfo(ax, verbosity=verbosity)
+	from . import code as _code
+
+	p = _code.PlotInfo(ax, verbosity=verbosity)
 
 	p.check_axis(axis)
 	p.subset_ticklabels(axis, labels)
@@ -55,6 +56,10 @@ def annotate_ticks(ax, axis, labels,
 	p.apply_shift(axis, perp_shift=perp_shift)
 	p.plot_annotation_lines(axis, rel_tick_size=rel_tick_size)
 
+	#Keep PlotInfo for reuse by format_ticklabels; the state includes the labels hidden by subsetting
+	p.tick_state = p.get_tick_state()
+	p.ax._plotannot_plotinfo = p
+
 
 def format_ticklabels(ax, axis, labels=None, format_ticks=False, verbosity=1, **kwargs): 
 	"""
@@ -77,12 +82,31 @@ def format_ticklabels(ax, axis, labels=None, format_ticks=False, verbosity=1, **
 		e.g. "color='red'" will set the color of the label to red using the label-function 'set_color'.
 	"""
 
-	p = plotannot.code.PlotInfo(ax, verbosity=verbosity)
-	axis = p.format_axis(axis)
+	from . import code as _code
 
 	#Check if kwargs were given
 	if len(kwargs) == 0:
 		raise ValueError("No attributes given to format labels.")
+
+	#Format all visible labels directly if no subset or ticks are needed; avoids measuring ticks and labels
+	axes = _code._find_axes(ax)
+	if labels is None and format_ticks == False and verbosity <= 1 and axes is not None:
+		for a in _code.PlotInfo.format_axis(axis):
+			axis_name, label_attr = _code._LABEL_ATTR[a]
+			ticks = getattr(axes, axis_name).get_major_ticks()
+			label_objects = [getattr(tick, label_attr) for tick in ticks if getattr(tick, label_attr)._visible == True]
+			_set_attributes(label_objects, [], kwargs)
+
+		axes.stale = True #changes to ticklabels are not propagated to the figure
+		return
+
+	p = _get_plotinfo(ax, verbosity=verbosity)
+	axis = p.format_axis(axis)
+
+	#Convert labels to strings once for all axis
+	if labels is not None:
+		labels = [str(l) for l in labels]
+		labels_set = frozenset(labels)
 	
 	#Apply to axis (can be more than one if axis is "xaxis" or "yaxis")
 	for a in axis:
@@ -93,29 +117,50 @@ def format_ticklabels(ax, axis, labels=None, format_ticks=False, verbosity=1, **
 		
 		#Subset to labels if chosen
 		if labels is not None:
-			labels = [str(l) for l in labels]
-
 			p.check_labels(a, labels)
-			indices = [i for i, o in enumerate(label_objects) if o._text in labels]
-			label_objects = [label_objects[i] for i in indices] 
-			tick_objects = [tick_objects[i] for i in indices]
-
-		#Apply attributes to ticklabels
-		for attribute, value in kwargs.items():
-			
-			func_name = "set_" + attribute
-			
-			#Format labels
-			for label in label_objects:
-				try:
-					f = getattr(label, func_name)
-				except:
-					raise ValueError("{func_name}")
-				f(value)
-			
-			#Format ticks
-			if format_ticks == True:
-				for tick in tick_objects:
-					if hasattr(tick, func_name):
-						f = getattr(tick, func_name)
-						f(value)
+			pairs = [(label, tick) for label, tick in zip(label_objects, tick_objects) if label._text in labels_set]
+			label_objects = [label for label, _ in pairs]
+			tick_objects = [tick for _, tick in pairs]
+
+		#Apply attributes to ticklabels (and ticks)
+		_set_attributes(label_objects, tick_objects if format_ticks == True else [], kwargs)
+
+	p.ax.stale = True #changes to ticklabels are not propagated to the figure
+
+
+def _get_plotinfo(ax, verbosity=1):
+	""" Get the PlotInfo stored on axes by the last call to annotate_ticks/format_ticklabels, or create a new PlotInfo if ticks changed since """
+
+	from . import code as _code
+
+	axes = _code._find_axes(ax)
+	p = getattr(axes, "_plotannot_plotinfo", None)
+	if p is None or p._stale():
+		p = _code.PlotInfo(ax, verbosity=verbosity)
+		p.ax._plotannot_plotinfo = p
+	else:
+		p.set_logger(verbosity=verbosity)
+		p.logger.debug("Reusing PlotInfo stored on axes")
+
+	return p
+
+
+def _set_attributes(label_objects, tick_objects, kwargs):
+	""" Set attributes of labels (and ticks) using the function "set_" + attribute of each object """
+
+	import matplotlib.artist
+
+	#Format labels; all attributes are set in one pass over labels
+	try:
+		matplotlib.artist.setp(label_objects, **kwargs)
+	except AttributeError as e:
+		raise ValueError(f"Unknown label attribute given in {list(kwargs)}: {e}") from None
+
+	#Format ticks; only attributes which ticks have are set
+	for attribute, value in kwargs.items():
+
+		func_name = "set_" + attribute
+		if len(tick_objects) > 0 and hasattr(type(tick_objects[0]), func_name):
+			f = getattr(type(tick_objects[0]), func_name)
+			for tick in tick_objects:
+				f(tick, value)